@@ -0,0 +1,137 @@
+"""
+Benchmark - Orden de os.walk vs planificación por tamaño
+
+Genera árboles sintéticos con archivos dispersos (no ocupan disco), obtiene
+el orden real de os.walk con FileService y simula de forma discreta la cola
+de GCSService.upload_files: cada worker libre toma la siguiente tarea y cada
+archivo tarda latencia + tamaño / ancho_de_banda_por_conexión. Compara el
+tiempo total (makespan) del orden de recorrido contra UploadScheduler.
+
+Al ser una simulación, los resultados no incluyen ruido de hilos ni de
+temporizadores: las diferencias se deben solo al orden de las tareas.
+
+Uso:
+    python benchmarks/bench_upload_scheduler.py [--workers 8]
+"""
+
+import os
+import sys
+import heapq
+import random
+import shutil
+import argparse
+import logging
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.services.file_service import FileService
+from src.services.upload_scheduler import UploadScheduler
+
+MB = 1024 * 1024
+GB = 1024 * MB
+
+# Modelo de red simulado
+BANDWIDTH_PER_CONNECTION = 50 * MB  # bytes/s
+REQUEST_LATENCY = 0.03  # s por archivo
+
+
+def _write_sparse(path: Path, size: int) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'wb') as f:
+        f.truncate(size)
+
+
+def build_tree(root: Path, name: str, rng: random.Random) -> None:
+    """
+    Crea un árbol sintético de archivos dispersos
+    """
+    if name == "mixto":
+        sizes = [rng.randint(1024, 512 * 1024) for _ in range(1500)]
+        sizes += [rng.randint(5 * MB, 80 * MB) for _ in range(30)]
+        sizes += [rng.randint(1 * GB, 3 * GB) for _ in range(3)]
+        rng.shuffle(sizes)
+        for i, size in enumerate(sizes):
+            _write_sparse(root / f"d{i % 40:02d}" / f"f{i:05d}.bin", size)
+
+    elif name == "grandes_al_final":
+        for i in range(1500):
+            _write_sparse(root / f"a{i % 40:02d}" / f"f{i:05d}.bin", rng.randint(1024, 512 * 1024))
+        for i in range(30):
+            _write_sparse(root / "m" / f"f{i:05d}.bin", rng.randint(5 * MB, 80 * MB))
+        for i in range(3):
+            _write_sparse(root / "zz_exports" / f"export{i}.sql", rng.randint(1 * GB, 3 * GB))
+
+    elif name == "uniforme":
+        for i in range(2000):
+            _write_sparse(root / f"d{i % 40:02d}" / f"f{i:05d}.bin", rng.randint(1024, 512 * 1024))
+
+    else:
+        raise ValueError(f"Árbol desconocido: {name}")
+
+
+def upload_cost(size: int) -> float:
+    """
+    Tiempo simulado de subir un archivo por una conexión
+    """
+    return REQUEST_LATENCY + size / BANDWIDTH_PER_CONNECTION
+
+
+def lower_bound(sized_files, workers: int) -> float:
+    """
+    Cota inferior del makespan: trabajo total repartido o el archivo más lento
+    """
+    costs = [upload_cost(size) for _, _, size in sized_files]
+    return max(sum(costs) / workers, max(costs))
+
+
+def simulate(tasks, workers: int) -> float:
+    """
+    Makespan de una cola FIFO de tareas atendida por `workers` conexiones
+
+    Reproduce el comportamiento de upload_files: cada worker que se libera
+    toma la siguiente tarea y sube sus archivos uno tras otro.
+    """
+    finish_times = [0.0] * workers
+    for task in tasks:
+        start = heapq.heappop(finish_times)
+        heapq.heappush(finish_times, start + sum(upload_cost(size) for _, _, size in task))
+    return max(finish_times)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    file_service = FileService(logger=logging.getLogger("bench"))
+    file_service.logger.setLevel(logging.WARNING)
+
+    print(f"workers={args.workers}  ancho de banda/conexión={BANDWIDTH_PER_CONNECTION // MB} MB/s  "
+          f"latencia={REQUEST_LATENCY * 1000:.0f} ms  (tiempos simulados en segundos)")
+    print(f"{'árbol':<18}{'cota':>10}{'os.walk':>10}{'planif.':>10}{'mejora':>9}")
+
+    for name in ("mixto", "grandes_al_final", "uniforme"):
+        root = Path(tempfile.mkdtemp(prefix=f"bench_{name}_"))
+        try:
+            build_tree(root, name, random.Random(args.seed))
+            files = file_service.get_files_to_upload(str(root))
+
+            sized_files = [(f, rel, os.path.getsize(f)) for f, rel in files]
+
+            bound = lower_bound(sized_files, args.workers)
+            walk = simulate(UploadScheduler(size_order=False).schedule(sized_files), args.workers)
+            scheduled = simulate(UploadScheduler().schedule(sized_files), args.workers)
+
+            print(f"{name:<18}{bound:>10.1f}{walk:>10.1f}{scheduled:>10.1f}{walk / scheduled:>8.2f}x")
+        finally:
+            shutil.rmtree(root)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
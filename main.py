@@ -32,6 +32,10 @@ def main():
         # Opción 1: Cargar configuración desde variables de entorno
         settings = Settings.from_env()
 
+        # --profile activa el perfilado aunque no se haya definido PROFILE_DIR
+        if '--profile' in sys.argv[1:] and not settings.profile_dir:
+            settings.profile_dir = "logs/profile"
+
         # Opción 2: Configuración manual (comentar Opción 1 y descomentar esto)
         # settings = Settings(
         #     bucket_name="tu-bucket-name",
@@ -45,6 +49,11 @@ def main():
         # Crear instancia del uploader
         uploader = FolderUploader(settings=settings, logger=logger)
 
+        # Modo plan: solo informar qué se subiría, sin copiar ni conectarse a GCS
+        if settings.dry_run or '--plan' in sys.argv[1:]:
+            uploader.plan()
+            return 0
+
         # Ejecutar proceso completo
         result = uploader.process_and_upload()
 
@@ -450,6 +450,28 @@ check_status() {
         echo "  - Log principal: Sin registros"
     fi
 
+    echo ""
+    echo -e "${CYAN}Plan del próximo backup:${NC}"
+    if [ -d "venv" ] && [ -f ".env" ]; then
+        PLAN_EXIT=0
+        PLAN_OUTPUT=$(
+            source venv/bin/activate
+            set -a
+            source .env
+            set +a
+            python3 main.py --plan 2>&1
+        ) || PLAN_EXIT=$?
+
+        if [ $PLAN_EXIT -eq 0 ]; then
+            echo "$PLAN_OUTPUT" | grep -E "Archivos a subir:|Cambios|manifiesto" | sed 's/^.* - INFO - /  /'
+        else
+            echo "  ✗ No se pudo calcular el plan (código $PLAN_EXIT)"
+            echo "$PLAN_OUTPUT" | grep -E " - (ERROR|CRITICAL) - " | sed 's/^.* - [A-Z]* - /    /' | tail -3
+        fi
+    else
+        echo "  - Sistema no instalado o configurado"
+    fi
+
     echo ""
     echo -e "${CYAN}Cron Jobs:${NC}"
     if crontab -l 2>/dev/null | grep -q "$SCRIPT_DIR"; then
@@ -572,6 +594,16 @@ if [ "$1" = "--backup" ]; then
     exit $EXIT_CODE
 fi
 
+# Plan rápido (sin subir nada) para health checks
+if [ "$1" = "--plan" ]; then
+    source venv/bin/activate
+    set -a
+    source .env
+    set +a
+    python3 main.py --plan
+    exit $?
+fi
+
 # Auto-setup: verificar e instalar/configurar si es necesario
 auto_setup
 
@@ -4,8 +4,8 @@ Settings - Configuración de la aplicación
 
 import os
 from pathlib import Path
-from typing import Optional
-from dataclasses import dataclass
+from typing import Optional, List
+from dataclasses import dataclass, field
 
 
 @dataclass
@@ -27,6 +27,23 @@ class Settings:
     keep_temp: bool = False
     log_level: str = "INFO"
     log_file: Optional[str] = None
+    manifest_path: Optional[str] = None
+    dry_run: bool = False
+
+    # Subida
+    upload_workers: int = 4
+    upload_priority_paths: List[str] = field(default_factory=list)
+
+    # Subida por bloques (delta) para archivos grandes
+    delta_uploads: bool = False
+    delta_min_size: int = 64 * 1024 * 1024
+    delta_workers: Optional[int] = None
+    delta_keep_versions: int = 0
+
+    # Perfilado
+    profile_dir: Optional[str] = None
+    profile_mode: str = "sampling"
+    profile_top_n: int = 20
 
     @classmethod
     def from_env(cls) -> 'Settings':
@@ -41,6 +58,16 @@ class Settings:
             KEEP_TEMP: Mantener archivos temporales (true/false)
             LOG_LEVEL: Nivel de logging (INFO, DEBUG, etc.)
             LOG_FILE: Ruta del archivo de log
+            MANIFEST_PATH: Ruta del manifiesto del último backup (opcional)
+            DRY_RUN: Solo mostrar el plan sin subir nada (true/false)
+            UPLOAD_WORKERS: Número de subidas simultáneas
+            UPLOAD_PRIORITY_PATHS: Rutas relativas que se suben primero, separadas por comas
+            DELTA_UPLOADS: Subir archivos grandes por bloques (true/false)
+            DELTA_MIN_SIZE: Tamaño mínimo en bytes para usar subida por bloques
+            DELTA_WORKERS: Procesos para calcular bloques (por defecto, CPUs disponibles)
+            PROFILE_DIR: Carpeta de perfiles; si se define se activa el perfilado
+            PROFILE_MODE: Modo de perfilado (sampling/deterministic)
+            PROFILE_TOP_N: Número de operaciones más lentas a registrar
         """
         return cls(
             bucket_name=os.getenv('GCS_BUCKET_NAME', ''),
@@ -49,7 +76,18 @@ class Settings:
             gcs_folder_name=os.getenv('GCS_FOLDER_NAME', 'external_server_backup/uno_backup'),
             keep_temp=os.getenv('KEEP_TEMP', 'false').lower() == 'true',
             log_level=os.getenv('LOG_LEVEL', 'INFO'),
-            log_file=os.getenv('LOG_FILE')
+            log_file=os.getenv('LOG_FILE'),
+            manifest_path=os.getenv('MANIFEST_PATH'),
+            dry_run=os.getenv('DRY_RUN', 'false').lower() == 'true',
+            upload_workers=int(os.getenv('UPLOAD_WORKERS', '4')),
+            upload_priority_paths=[p.strip() for p in os.getenv('UPLOAD_PRIORITY_PATHS', '').split(',') if p.strip()],
+            delta_uploads=os.getenv('DELTA_UPLOADS', 'false').lower() == 'true',
+            delta_min_size=int(os.getenv('DELTA_MIN_SIZE', str(64 * 1024 * 1024))),
+            delta_workers=int(os.getenv('DELTA_WORKERS')) if os.getenv('DELTA_WORKERS') else None,
+            delta_keep_versions=int(os.getenv('DELTA_KEEP_VERSIONS', '0')),
+            profile_dir=os.getenv('PROFILE_DIR'),
+            profile_mode=os.getenv('PROFILE_MODE', 'sampling'),
+            profile_top_n=int(os.getenv('PROFILE_TOP_N', '20'))
         )
 
     def validate(self) -> bool:
@@ -71,4 +109,13 @@ class Settings:
         if not Path(self.source_folder).exists():
             raise ValueError(f"La carpeta origen no existe: {self.source_folder}")
 
+        if self.upload_workers < 1:
+            raise ValueError("upload_workers debe ser mayor o igual a 1")
+
+        if self.delta_keep_versions < 0:
+            raise ValueError("delta_keep_versions debe ser mayor o igual a 0")
+
+        if self.profile_mode not in ('sampling', 'deterministic'):
+            raise ValueError(f"profile_mode inválido: {self.profile_mode} (usa sampling o deterministic)")
+
         return True
@@ -2,11 +2,17 @@
 Folder Uploader - Clase principal para backup de carpetas a GCS
 """
 
+import os
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 from ..services.file_service import FileService
 from ..services.gcs_service import GCSService
+from ..services.manifest_service import ManifestService
+from ..services.delta_service import DeltaService
+from ..services.upload_scheduler import UploadScheduler
 from ..config.settings import Settings
+from ..utils.profiler import PipelineProfiler
 
 
 class FolderUploader:
@@ -35,16 +41,108 @@ class FolderUploader:
             self.logger.error(f"Error en la configuración: {e}")
             raise
 
-        # Inicializar servicios
-        self.file_service = FileService(logger=self.logger)
-        self.gcs_service = GCSService(
-            bucket_name=self.settings.bucket_name,
-            credentials_path=self.settings.credentials_path,
+        # Perfilador (sin costo si no hay profile_dir)
+        self.profiler = PipelineProfiler(
+            output_dir=self.settings.profile_dir,
+            mode=self.settings.profile_mode,
+            top_n=self.settings.profile_top_n,
             logger=self.logger
         )
 
+        # Inicializar servicios (GCS se conecta solo cuando se necesita)
+        self.file_service = FileService(logger=self.logger, profiler=self.profiler)
+        self.manifest_service = ManifestService(
+            manifest_path=self.settings.manifest_path,
+            logger=self.logger
+        )
+        self._gcs_service: Optional[GCSService] = None
+        self._delta_service: Optional[DeltaService] = None
+
         self.logger.info("FolderUploader inicializado correctamente")
 
+    @property
+    def gcs_service(self) -> GCSService:
+        """
+        Servicio de GCS, creado en el primer uso
+
+        Returns:
+            Instancia de GCSService conectada al bucket
+        """
+        if self._gcs_service is None:
+            self._gcs_service = GCSService(
+                bucket_name=self.settings.bucket_name,
+                credentials_path=self.settings.credentials_path,
+                logger=self.logger,
+                profiler=self.profiler
+            )
+        return self._gcs_service
+
+    @property
+    def delta_service(self) -> DeltaService:
+        """
+        Servicio de subida por bloques, creado en el primer uso
+
+        Returns:
+            Instancia de DeltaService sobre el mismo bucket
+        """
+        if self._delta_service is None:
+            self._delta_service = DeltaService(
+                gcs_service=self.gcs_service,
+                workers=self.settings.delta_workers,
+                upload_workers=self.settings.upload_workers,
+                keep_versions=self.settings.delta_keep_versions,
+                logger=self.logger,
+                profiler=self.profiler
+            )
+        return self._delta_service
+
+    def plan(self, source_path: Optional[str] = None) -> dict:
+        """
+        Calcula qué haría un backup sin copiar ni conectarse a GCS
+
+        Args:
+            source_path: Ruta de la carpeta origen (usa settings si es None)
+
+        Returns:
+            Diccionario con el plan:
+            {
+                'files': int (archivos que se subirán; el backup sube todos),
+                'bytes': int (bytes que se subirán),
+                'files_changed': int o None si no hay manifiesto,
+                'bytes_changed': int o None si no hay manifiesto
+            }
+        """
+        source_path = source_path or self.settings.source_folder
+
+        entries = self.file_service.scan_folder(source_path)
+        total_bytes = sum(size for _, _, size, _ in entries)
+
+        result = {
+            'files': len(entries),
+            'bytes': total_bytes,
+            'files_changed': None,
+            'bytes_changed': None
+        }
+
+        manifest = self.manifest_service.load()
+        if manifest is not None:
+            changed = self.manifest_service.diff(entries, manifest)
+            result['files_changed'] = len(changed)
+            result['bytes_changed'] = sum(size for _, _, size, _ in changed)
+
+        format_size = self.file_service.format_size
+        self.logger.info(f"Plan de backup para: {source_path}")
+        self.logger.info(f"  Archivos a subir: {result['files']} ({format_size(total_bytes)})")
+        if result['files_changed'] is not None:
+            self.logger.info(
+                f"  Cambios desde el último backup: {result['files_changed']} archivos "
+                f"({format_size(result['bytes_changed'])}) (informativo, se suben todos)"
+            )
+        else:
+            self.logger.info("  Sin manifiesto previo: no se puede calcular qué archivos cambiaron")
+
+        return result
+
     def copy_folder_local(self, source_path: str, temp_dir: Optional[str] = None) -> str:
         """
         Crea una copia temporal de la carpeta
@@ -73,27 +171,69 @@ class FolderUploader:
             Número de archivos subidos exitosamente
         """
         if gcs_folder_name is None:
-            import os
             gcs_folder_name = os.path.basename(local_folder_path)
 
         # Obtener lista de archivos
-        files_to_upload = self.file_service.get_files_to_upload(local_folder_path)
+        with self.profiler.stage('scan'):
+            files_to_upload = self.file_service.get_files_to_upload(local_folder_path)
 
         if not files_to_upload:
             self.logger.warning("No hay archivos para subir")
             return 0
 
         # Mostrar información del tamaño
-        folder_size = self.file_service.get_folder_size(local_folder_path)
+        with self.profiler.stage('size'):
+            folder_size = self.file_service.get_folder_size(local_folder_path)
         formatted_size = self.file_service.format_size(folder_size)
         self.logger.info(f"Tamaño total a subir: {formatted_size}")
 
-        # Subir archivos
-        uploaded_count = self.gcs_service.upload_files(
-            files_to_upload=files_to_upload,
-            gcs_folder_name=gcs_folder_name,
-            show_progress=show_progress
-        )
+        # Separar archivos grandes para subirlos por bloques
+        delta_files = []
+        if self.settings.delta_uploads:
+            min_size = self.settings.delta_min_size
+            delta_files = [f for f in files_to_upload if os.path.getsize(f[0]) >= min_size]
+            if delta_files:
+                delta_set = set(delta_files)
+                files_to_upload = [f for f in files_to_upload if f not in delta_set]
+
+        uploaded_count = 0
+
+        with self.profiler.stage('upload'):
+            # Los archivos por bloques son los más grandes: arrancan primero, en
+            # paralelo con la subida normal, para no alargar el tiempo total
+            delta_future = None
+            delta_executor = None
+            if delta_files:
+                delta_service = self.delta_service
+                delta_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="delta")
+                delta_future = delta_executor.submit(
+                    delta_service.upload_files,
+                    files_to_upload=delta_files,
+                    gcs_folder_name=gcs_folder_name
+                )
+
+            try:
+                if files_to_upload:
+                    uploaded_count += self.gcs_service.upload_files(
+                        files_to_upload=files_to_upload,
+                        gcs_folder_name=gcs_folder_name,
+                        show_progress=show_progress,
+                        workers=self.settings.upload_workers,
+                        scheduler=UploadScheduler(priority_paths=self.settings.upload_priority_paths)
+                    )
+                if delta_future is not None:
+                    uploaded_count += delta_future.result()
+            except BaseException:
+                # Ctrl-C u otro error: detener la subida por bloques sin esperarla
+                if delta_future is not None:
+                    delta_service.cancel()
+                    delta_executor.shutdown(wait=False, cancel_futures=True)
+                    # Un servicio cancelado no vuelve a subir: el próximo uso crea otro
+                    self._delta_service = None
+                raise
+
+            if delta_executor is not None:
+                delta_executor.shutdown()
 
         return uploaded_count
 
@@ -116,6 +256,7 @@ class FolderUploader:
                 'success': bool,
                 'files_uploaded': int,
                 'temp_path': str,
+                'profile_path': str (solo con perfilado activo),
                 'error': str (opcional)
             }
         """
@@ -128,6 +269,7 @@ class FolderUploader:
             'success': False,
             'files_uploaded': 0,
             'temp_path': None,
+            'profile_path': None,
             'error': None
         }
 
@@ -137,7 +279,8 @@ class FolderUploader:
             self.logger.info(f"Iniciando proceso de backup de: {source_path}")
 
             # Crear copia temporal
-            temp_path = self.copy_folder_local(source_path)
+            with self.profiler.stage('copy'):
+                temp_path = self.copy_folder_local(source_path)
             result['temp_path'] = temp_path
 
             # Subir a GCS
@@ -150,6 +293,14 @@ class FolderUploader:
             result['files_uploaded'] = files_uploaded
             result['success'] = files_uploaded > 0
 
+            # Registrar el estado subido para futuros planes
+            if self.manifest_service.enabled and result['success']:
+                entries = self.file_service.scan_folder(temp_path)
+                if files_uploaded == len(entries):
+                    self.manifest_service.save(entries)
+                else:
+                    self.logger.warning("Subida incompleta: no se actualiza el manifiesto")
+
             if result['success']:
                 self.logger.info(f"Proceso completado exitosamente: {files_uploaded} archivos subidos")
             else:
@@ -169,6 +320,12 @@ class FolderUploader:
                 except Exception as e:
                     self.logger.warning(f"No se pudo limpiar los archivos temporales: {e}")
 
+            # Guardar perfiles de las etapas ejecutadas
+            try:
+                result['profile_path'] = self.profiler.write_reports()
+            except Exception as e:
+                self.logger.warning(f"No se pudieron guardar los perfiles: {e}")
+
         return result
 
     def verify_backup(self, gcs_folder_name: str, expected_files: int) -> bool:
@@ -183,8 +340,20 @@ class FolderUploader:
             True si el backup es válido
         """
         try:
-            uploaded_files = self.gcs_service.list_files(prefix=gcs_folder_name)
-            actual_count = len(uploaded_files)
+            folder_prefix = f"{gcs_folder_name}/"
+            uploaded_files = self.gcs_service.list_files(prefix=folder_prefix)
+
+            # Rutas relativas de los objetos normales (sin los bloques de .delta/)
+            delta_prefix = f"{folder_prefix}{DeltaService.DELTA_DIR}/"
+            backed_up = {name[len(folder_prefix):] for name in uploaded_files
+                         if not name.startswith(delta_prefix)}
+
+            # Un archivo con índice de bloques cuenta una sola vez aunque
+            # siga existiendo su copia completa de antes del modo delta
+            if len(backed_up) != len(uploaded_files):
+                backed_up |= self.delta_service.list_indexed_files(gcs_folder_name)
+
+            actual_count = len(backed_up)
 
             self.logger.info(f"Verificación: {actual_count}/{expected_files} archivos")
 
@@ -4,5 +4,8 @@ Services module - Servicios para operaciones de archivos y GCS
 
 from .file_service import FileService
 from .gcs_service import GCSService
+from .manifest_service import ManifestService
+from .delta_service import DeltaService
+from .upload_scheduler import UploadScheduler
 
-__all__ = ['FileService', 'GCSService']
+__all__ = ['FileService', 'GCSService', 'ManifestService', 'DeltaService', 'UploadScheduler']
@@ -3,11 +3,13 @@ File Service - Operaciones con archivos locales
 """
 
 import os
+import time
 import shutil
 import tempfile
 from pathlib import Path
 from typing import Optional, List, Tuple
 import logging
+from ..utils.profiler import PipelineProfiler
 
 
 class FileService:
@@ -15,14 +17,17 @@ class FileService:
     Servicio para operaciones de archivos locales
     """
 
-    def __init__(self, logger: Optional[logging.Logger] = None):
+    def __init__(self, logger: Optional[logging.Logger] = None,
+                 profiler: Optional[PipelineProfiler] = None):
         """
         Inicializa el servicio de archivos
 
         Args:
             logger: Logger opcional para registro de operaciones
+            profiler: Perfilador opcional para medir operaciones por archivo
         """
         self.logger = logger or logging.getLogger(__name__)
+        self.profiler = profiler
 
     def copy_folder(self, source_path: str, temp_dir: Optional[str] = None) -> str:
         """
@@ -56,14 +61,28 @@ class FileService:
 
         self.logger.info(f"Copiando {source_path} a {destination}...")
 
+        # Con perfilado activo se mide cada copia individual
+        copy_function = shutil.copy2
+        if self.profiler and self.profiler.enabled:
+            copy_function = self._timed_copy
+
         try:
-            shutil.copytree(source, destination)
+            shutil.copytree(source, destination, copy_function=copy_function)
             self.logger.info("Copia local completada")
             return str(destination)
         except Exception as e:
             self.logger.error(f"Error al copiar carpeta: {e}")
             raise
 
+    def _timed_copy(self, src: str, dst: str) -> str:
+        """
+        Copia un archivo registrando su duración en el perfilador
+        """
+        start = time.perf_counter()
+        result = shutil.copy2(src, dst)
+        self.profiler.record_op('copy', src, os.path.getsize(dst), time.perf_counter() - start)
+        return result
+
     def get_files_to_upload(self, local_folder_path: str) -> List[Tuple[str, str]]:
         """
         Obtiene la lista de archivos a subir desde una carpeta
@@ -86,6 +105,35 @@ class FileService:
         self.logger.info(f"Encontrados {len(files_to_upload)} archivos para subir")
         return files_to_upload
 
+    def scan_folder(self, folder_path: str) -> List[Tuple[str, str, int, float]]:
+        """
+        Recorre una carpeta obteniendo tamaño y fecha de cada archivo en una sola pasada
+
+        Args:
+            folder_path: Ruta de la carpeta
+
+        Returns:
+            Lista de tuplas (ruta_completa, ruta_relativa, tamaño, mtime)
+        """
+        root_len = len(os.path.join(str(folder_path), ''))
+        entries = []
+        pending = [str(folder_path)]
+
+        while pending:
+            current = pending.pop()
+            with os.scandir(current) as it:
+                for entry in it:
+                    # Igual que copytree(symlinks=False): se sigue el contenido
+                    # de los enlaces a carpetas
+                    if entry.is_dir():
+                        pending.append(entry.path)
+                    elif entry.is_file():
+                        stat = entry.stat()
+                        entries.append((entry.path, entry.path[root_len:],
+                                        stat.st_size, stat.st_mtime))
+
+        return entries
+
     def cleanup_temp(self, temp_path: str) -> None:
         """
         Limpia archivos temporales
@@ -3,11 +3,14 @@ GCS Service - Operaciones con Google Cloud Storage
 """
 
 import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional, List, Tuple
 import logging
-from google.cloud import storage
-from tqdm import tqdm
+from .upload_scheduler import UploadScheduler, SizedFile
+from ..utils.profiler import PipelineProfiler
 
 
 class GCSService:
@@ -16,7 +19,8 @@ class GCSService:
     """
 
     def __init__(self, bucket_name: str, credentials_path: Optional[str] = None,
-                 logger: Optional[logging.Logger] = None):
+                 logger: Optional[logging.Logger] = None,
+                 profiler: Optional[PipelineProfiler] = None):
         """
         Inicializa el servicio de GCS
 
@@ -24,6 +28,7 @@ class GCSService:
             bucket_name: Nombre del bucket en GCS
             credentials_path: Ruta al archivo de credenciales JSON (opcional)
             logger: Logger opcional para registro de operaciones
+            profiler: Perfilador opcional para medir cada subida
 
         Raises:
             ValueError: Si el bucket_name está vacío
@@ -32,6 +37,7 @@ class GCSService:
             raise ValueError("bucket_name no puede estar vacío")
 
         self.logger = logger or logging.getLogger(__name__)
+        self.profiler = profiler
 
         # Configurar credenciales si se proporcionan
         if credentials_path:
@@ -40,6 +46,10 @@ class GCSService:
             os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = credentials_path
             self.logger.info(f"Usando credenciales desde: {credentials_path}")
 
+        # Importación diferida: google-cloud-storage tarda en cargar y solo
+        # se necesita cuando realmente hay que conectarse al bucket
+        from google.cloud import storage
+
         try:
             self.client = storage.Client()
             self.bucket = self.client.bucket(bucket_name)
@@ -49,35 +59,84 @@ class GCSService:
             raise
 
     def upload_files(self, files_to_upload: List[Tuple[str, str]],
-                    gcs_folder_name: str, show_progress: bool = True) -> int:
+                    gcs_folder_name: str, show_progress: bool = True,
+                    workers: int = 1,
+                    scheduler: Optional[UploadScheduler] = None) -> int:
         """
         Sube múltiples archivos a GCS
 
+        Los archivos se reparten en tareas según su tamaño (ver UploadScheduler)
+        y se suben en paralelo con `workers` conexiones simultáneas.
+
         Args:
             files_to_upload: Lista de tuplas (ruta_local, ruta_relativa)
             gcs_folder_name: Nombre de la carpeta base en GCS
             show_progress: Mostrar barra de progreso
+            workers: Número de subidas simultáneas
+            scheduler: Planificador del orden de subida (por defecto, por tamaño)
 
         Returns:
             Número de archivos subidos exitosamente
         """
         self.logger.info(f"Iniciando subida de {len(files_to_upload)} archivos a GCS...")
 
+        scheduler = scheduler or UploadScheduler()
+        sized_files = [(local_file, relative_path, os.path.getsize(local_file))
+                       for local_file, relative_path in files_to_upload]
+        tasks = scheduler.schedule(sized_files)
+
         uploaded_count = 0
         failed_files = []
+        lock = threading.Lock()
+
+        # Configurar barra de progreso (en bytes, ya que los archivos varían mucho de tamaño)
+        progress = None
+        if show_progress:
+            from tqdm import tqdm
+            progress = tqdm(total=sum(f[2] for f in sized_files), desc="Subiendo archivos",
+                            unit="B", unit_scale=True)
+
+        def run_task(task: List[SizedFile]) -> None:
+            nonlocal uploaded_count
+            for local_file, relative_path, size in task:
+                try:
+                    blob_name = f"{gcs_folder_name}/{relative_path}".replace("\\", "/")
+                    blob = self.bucket.blob(blob_name)
+                    start = time.perf_counter()
+                    blob.upload_from_filename(local_file)
+                    if self.profiler:
+                        self.profiler.record_op('upload', local_file, size,
+                                                time.perf_counter() - start)
+                    with lock:
+                        uploaded_count += 1
+                except Exception as e:
+                    self.logger.error(f"Error al subir {local_file}: {e}")
+                    with lock:
+                        failed_files.append((local_file, str(e)))
+                finally:
+                    if progress is not None:
+                        with lock:
+                            progress.update(size)
 
-        # Configurar iterador con o sin barra de progreso
-        iterator = tqdm(files_to_upload, desc="Subiendo archivos") if show_progress else files_to_upload
-
-        for local_file, relative_path in iterator:
-            try:
-                blob_name = f"{gcs_folder_name}/{relative_path}".replace("\\", "/")
-                blob = self.bucket.blob(blob_name)
-                blob.upload_from_filename(local_file)
-                uploaded_count += 1
-            except Exception as e:
-                self.logger.error(f"Error al subir {local_file}: {e}")
-                failed_files.append((local_file, str(e)))
+        try:
+            if workers <= 1:
+                for task in tasks:
+                    run_task(task)
+            else:
+                # La cola del executor es FIFO: los workers toman las tareas en el orden planificado
+                executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gcs-upload")
+                try:
+                    for future in [executor.submit(run_task, task) for task in tasks]:
+                        future.result()
+                except BaseException:
+                    # Ctrl-C u otro error: no esperar las tareas pendientes, solo
+                    # terminan las subidas que ya estaban en curso
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    raise
+                executor.shutdown()
+        finally:
+            if progress is not None:
+                progress.close()
 
         if failed_files:
             self.logger.warning(f"Fallaron {len(failed_files)} archivos:")
@@ -0,0 +1,106 @@
+"""
+Manifest Service - Registro local del último backup subido
+"""
+
+import json
+from pathlib import Path
+from typing import Optional, Dict, List, Tuple
+import logging
+
+
+class ManifestService:
+    """
+    Servicio para guardar y comparar el manifiesto del último backup
+
+    El manifiesto es un JSON local con el tamaño y la fecha de modificación
+    de cada archivo subido. Permite estimar qué archivos cambiaron sin
+    consultar GCS.
+    """
+
+    def __init__(self, manifest_path: Optional[str] = None,
+                 logger: Optional[logging.Logger] = None):
+        """
+        Inicializa el servicio de manifiesto
+
+        Args:
+            manifest_path: Ruta del archivo JSON del manifiesto (opcional)
+            logger: Logger opcional para registro de operaciones
+        """
+        self.manifest_path = manifest_path
+        self.logger = logger or logging.getLogger(__name__)
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Indica si hay un manifiesto configurado
+        """
+        return bool(self.manifest_path)
+
+    def load(self) -> Optional[Dict[str, Dict[str, float]]]:
+        """
+        Carga el manifiesto desde disco
+
+        Returns:
+            Diccionario {ruta_relativa: {'size': int, 'mtime': float}}
+            o None si no hay manifiesto disponible
+        """
+        if not self.enabled:
+            return None
+
+        path = Path(self.manifest_path)
+        if not path.exists():
+            return None
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data.get('files', {})
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"No se pudo leer el manifiesto {self.manifest_path}: {e}")
+            return None
+
+    def save(self, entries: List[Tuple[str, str, int, float]]) -> None:
+        """
+        Guarda el manifiesto a partir de los archivos subidos
+
+        Args:
+            entries: Lista de tuplas (ruta_completa, ruta_relativa, tamaño, mtime)
+        """
+        if not self.enabled:
+            return
+
+        files = {
+            relative_path: {'size': size, 'mtime': mtime}
+            for _, relative_path, size, mtime in entries
+        }
+
+        path = Path(self.manifest_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'files': files}, f)
+        tmp_path.replace(path)
+
+        self.logger.info(f"Manifiesto actualizado: {len(files)} archivos")
+
+    @staticmethod
+    def diff(entries: List[Tuple[str, str, int, float]],
+             manifest: Dict[str, Dict[str, float]]) -> List[Tuple[str, str, int, float]]:
+        """
+        Obtiene los archivos nuevos o modificados respecto al manifiesto
+
+        Args:
+            entries: Lista de tuplas (ruta_completa, ruta_relativa, tamaño, mtime)
+            manifest: Manifiesto cargado con load()
+
+        Returns:
+            Subconjunto de entries que habría que subir
+        """
+        pending = []
+        for entry in entries:
+            _, relative_path, size, mtime = entry
+            previous = manifest.get(relative_path)
+            if previous is None or previous['size'] != size or previous['mtime'] != mtime:
+                pending.append(entry)
+        return pending
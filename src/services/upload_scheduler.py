@@ -0,0 +1,108 @@
+"""
+Upload Scheduler - Orden y agrupación de subidas según tamaño
+"""
+
+from typing import Optional, List, Tuple
+
+
+# Tupla (ruta_local, ruta_relativa, tamaño)
+SizedFile = Tuple[str, str, int]
+
+
+class UploadScheduler:
+    """
+    Planifica el orden de las subidas para minimizar el tiempo total
+
+    Los archivos se reparten en tareas que los workers toman de una cola
+    compartida, en orden (Longest Processing Time first):
+
+    1. Archivos en rutas prioritarias, de mayor a menor
+    2. Archivos grandes, de mayor a menor, uno por tarea: los más pesados
+       arrancan primero y cada uno ocupa un worker propio
+    3. Archivos pequeños agrupados en lotes de hasta batch_bytes, que
+       rellenan los workers que van quedando libres
+
+    Así ningún archivo grande queda para el final con el resto de las
+    conexiones ociosas.
+    """
+
+    def __init__(self, priority_paths: Optional[List[str]] = None,
+                 small_file_size: int = 1024 * 1024,
+                 batch_bytes: int = 8 * 1024 * 1024,
+                 batch_files: int = 4,
+                 size_order: bool = True):
+        """
+        Inicializa el planificador
+
+        Args:
+            priority_paths: Prefijos de rutas relativas que se suben primero
+            small_file_size: Archivos menores a este tamaño se agrupan en lotes
+            batch_bytes: Tamaño máximo de un lote de archivos pequeños
+            batch_files: Cantidad máxima de archivos por lote
+            size_order: Si es False se conserva el orden original (un archivo por tarea)
+        """
+        self.priority_paths = [p.replace("\\", "/").strip("/") for p in (priority_paths or []) if p]
+        self.small_file_size = small_file_size
+        self.batch_bytes = batch_bytes
+        self.batch_files = batch_files
+        self.size_order = size_order
+
+    def is_priority(self, relative_path: str) -> bool:
+        """
+        Indica si una ruta relativa está dentro de una ruta prioritaria
+
+        Args:
+            relative_path: Ruta relativa del archivo
+
+        Returns:
+            True si coincide con algún prefijo prioritario
+        """
+        path = relative_path.replace("\\", "/")
+        return any(path == prefix or path.startswith(prefix + "/")
+                   for prefix in self.priority_paths)
+
+    def schedule(self, files: List[SizedFile]) -> List[List[SizedFile]]:
+        """
+        Genera la lista de tareas en el orden en que deben tomarse
+
+        Args:
+            files: Lista de tuplas (ruta_local, ruta_relativa, tamaño)
+
+        Returns:
+            Lista de tareas; cada tarea es una lista de archivos que sube un mismo worker
+        """
+        if not self.size_order:
+            return [[f] for f in files]
+
+        priority = []
+        large = []
+        small = []
+        for f in files:
+            if self.priority_paths and self.is_priority(f[1]):
+                priority.append(f)
+            elif f[2] >= self.small_file_size:
+                large.append(f)
+            else:
+                small.append(f)
+
+        by_size = lambda f: f[2]
+        priority.sort(key=by_size, reverse=True)
+        large.sort(key=by_size, reverse=True)
+        small.sort(key=by_size, reverse=True)
+
+        tasks = [[f] for f in priority]
+        tasks.extend([f] for f in large)
+
+        batch = []
+        batch_size = 0
+        for f in small:
+            if batch and (batch_size + f[2] > self.batch_bytes or len(batch) >= self.batch_files):
+                tasks.append(batch)
+                batch = []
+                batch_size = 0
+            batch.append(f)
+            batch_size += f[2]
+        if batch:
+            tasks.append(batch)
+
+        return tasks
@@ -3,5 +3,6 @@ Utils module - Utilidades generales
 """
 
 from .logger import setup_logger
+from .profiler import PipelineProfiler
 
-__all__ = ['setup_logger']
+__all__ = ['setup_logger', 'PipelineProfiler']
@@ -0,0 +1,240 @@
+"""
+Profiler utility - Perfilado opcional de las etapas del backup
+"""
+
+import os
+import sys
+import json
+import time
+import heapq
+import pstats
+import cProfile
+import threading
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, List, Tuple, Iterator
+
+
+class _StackSampler(threading.Thread):
+    """
+    Hilo que muestrea periódicamente las pilas de todos los hilos activos
+    """
+
+    def __init__(self, interval: float):
+        super().__init__(name="profiler-sampler", daemon=True)
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        own_ident = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident != own_ident:
+                    self.stacks[self._collapse(frame)] += 1
+
+    def stop(self) -> Counter:
+        self._stop_event.set()
+        self.join()
+        return self.stacks
+
+    @staticmethod
+    def _collapse(frame) -> str:
+        labels = []
+        while frame is not None:
+            module = frame.f_globals.get('__name__', '?')
+            labels.append(f"{module}:{frame.f_code.co_name}")
+            frame = frame.f_back
+        return ';'.join(reversed(labels))
+
+
+class PipelineProfiler:
+    """
+    Perfilador de las etapas del proceso de backup
+
+    Cada etapa se envuelve con stage(). En modo 'sampling' un hilo toma
+    muestras de las pilas de todos los hilos cada `interval` segundos (costo
+    casi nulo); en modo 'deterministic' además se usa cProfile sobre el hilo
+    que ejecuta la etapa y sobre cada hilo que se cree durante ella (por
+    ejemplo, los workers de subida). Antes de Python 3.12 cada hilo nuevo
+    tiene su propio cProfile y sus estadísticas se combinan al terminar;
+    desde 3.12 un único cProfile registra todos los hilos.
+    Los procesos que calculan bloques en modo delta no se perfilan.
+    Al finalizar se escriben, por etapa, archivos .collapsed (para flamegraphs)
+    y .pstats, junto con un summary.json con duraciones y las operaciones de
+    archivo más lentas.
+
+    Si output_dir es None el perfilador queda desactivado y no tiene costo.
+    """
+
+    MODES = ('sampling', 'deterministic')
+
+    def __init__(self, output_dir: Optional[str] = None, mode: str = 'sampling',
+                 top_n: int = 20, interval: float = 0.01,
+                 logger: Optional[logging.Logger] = None):
+        """
+        Inicializa el perfilador
+
+        Args:
+            output_dir: Carpeta donde guardar los perfiles (None desactiva)
+            mode: 'sampling' o 'deterministic'
+            top_n: Número de operaciones de archivo más lentas a registrar
+            interval: Intervalo de muestreo en segundos
+            logger: Logger opcional para registro de operaciones
+
+        Raises:
+            ValueError: Si el modo no es válido
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Modo de perfilado inválido: {mode} (usa {', '.join(self.MODES)})")
+
+        self.output_dir = output_dir
+        self.mode = mode
+        self.top_n = top_n
+        self.interval = interval
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._durations: Dict[str, float] = {}
+        self._stacks: Dict[str, Counter] = {}
+        self._stats: Dict[str, pstats.Stats] = {}
+        self._slowest: List[Tuple[float, str, str, int]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Indica si el perfilado está activo
+        """
+        return bool(self.output_dir)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Perfila una etapa del proceso
+
+        Args:
+            name: Nombre de la etapa (se usa como nombre de archivo)
+        """
+        if not self.enabled:
+            yield
+            return
+
+        sampler = _StackSampler(self.interval)
+        profile = cProfile.Profile() if self.mode == 'deterministic' else None
+        thread_profiles: List[Tuple[threading.Thread, cProfile.Profile]] = []
+
+        def start_thread_profile(frame, event, arg) -> None:
+            # Primer evento de un hilo nuevo: se reemplaza por su propio cProfile.
+            # Un error aquí no debe interrumpir el hilo perfilado
+            try:
+                thread_profile = cProfile.Profile()
+                thread_profile.enable()
+                thread_profiles.append((threading.current_thread(), thread_profile))
+            except Exception:
+                sys.setprofile(None)
+
+        # Desde Python 3.12 cProfile usa sys.monitoring: el perfil principal ya
+        # cubre todos los hilos y solo puede haber uno activo a la vez
+        per_thread = profile is not None and sys.version_info < (3, 12)
+
+        sampler.start()
+        if per_thread:
+            threading.setprofile(start_thread_profile)
+        if profile:
+            profile.enable()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if profile:
+                profile.disable()
+            if per_thread:
+                threading.setprofile(None)
+            stacks = sampler.stop()
+
+            self._durations[name] = self._durations.get(name, 0.0) + elapsed
+            self._stacks.setdefault(name, Counter()).update(stacks)
+            if profile:
+                stats = self._stats.get(name)
+                if stats is None:
+                    stats = self._stats[name] = pstats.Stats(profile)
+                else:
+                    stats.add(profile)
+
+                # Solo se combinan los hilos ya terminados: leer el perfil de
+                # un hilo que sigue corriendo no es seguro
+                for thread, thread_profile in thread_profiles:
+                    if not thread.is_alive():
+                        stats.add(thread_profile)
+
+            self.logger.info(f"[perfil] Etapa '{name}': {elapsed:.2f}s")
+
+    def record_op(self, operation: str, path: str, size: int, seconds: float) -> None:
+        """
+        Registra la duración de una operación sobre un archivo
+
+        Solo se conservan las top_n más lentas. Es seguro llamarlo desde varios hilos.
+
+        Args:
+            operation: Tipo de operación (ej: 'copy', 'upload')
+            path: Ruta del archivo
+            size: Tamaño en bytes
+            seconds: Duración de la operación
+        """
+        if not self.enabled:
+            return
+
+        item = (seconds, operation, path, size)
+        with self._lock:
+            if len(self._slowest) < self.top_n:
+                heapq.heappush(self._slowest, item)
+            elif seconds > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, item)
+
+    def write_reports(self) -> Optional[str]:
+        """
+        Escribe los perfiles de todas las etapas registradas
+
+        Returns:
+            Carpeta donde se escribieron los reportes (None si está desactivado)
+        """
+        if not self.enabled or not self._durations:
+            return None
+
+        run_dir = Path(self.output_dir) / datetime.now().strftime('%Y%m%d_%H%M%S')
+        run_dir.mkdir(parents=True, exist_ok=True)
+
+        for name, stacks in self._stacks.items():
+            with open(run_dir / f"{name}.collapsed", 'w', encoding='utf-8') as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+
+        for name, stats in self._stats.items():
+            stats.dump_stats(str(run_dir / f"{name}.pstats"))
+
+        slowest = sorted(self._slowest, reverse=True)
+        summary = {
+            'mode': self.mode,
+            'stages': {name: round(seconds, 4) for name, seconds in self._durations.items()},
+            'slowest_operations': [
+                {'operation': op, 'path': path, 'size': size, 'seconds': round(seconds, 4)}
+                for seconds, op, path, size in slowest
+            ]
+        }
+        with open(run_dir / 'summary.json', 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+
+        self.logger.info(f"[perfil] Reportes guardados en: {run_dir}")
+        for seconds, op, path, size in slowest[:5]:
+            self.logger.info(f"[perfil]   {op} {os.path.basename(path)} ({size} bytes): {seconds:.2f}s")
+
+        self._durations.clear()
+        self._stacks.clear()
+        self._stats.clear()
+        self._slowest.clear()
+
+        return str(run_dir)